@@ -0,0 +1,391 @@
+""" Reproducible benchmarks for the portfolio's entry points.
+
+Every benchmark generates synthetic input from a fixed seed, then times its
+entry point and measures its peak memory with tracemalloc. Benchmarks too
+short to time reliably are repeated within each timed sample. Results are
+saved as JSON so that two runs can be compared.
+
+Examples:
+    python benchmarks.py run --output baseline.json
+    python benchmarks.py run --sizes small medium large --output new.json
+    python benchmarks.py compare baseline.json new.json --threshold 0.1
+"""
+
+from argparse import ArgumentParser
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from credit_card import remaining_payments
+from fleet import CAR_RADIUS, Fleet, random_poses
+from gps import Map
+import people
+
+
+SEED = 326
+# shortest timed sample; quicker benchmarks are run several times per sample
+MIN_SAMPLE_SECONDS = 0.1
+# entries of the results' "meta" that must match for timings to be comparable
+COMPARABLE_META = ("python", "implementation", "platform")
+
+# workload of every benchmark at every size
+SIZES = {
+    "small": {"accounts": 1_000, "cities": 1_000, "employees": 10_000,
+              "range_cars": 100, "fleet_cars": 1_000, "cli_runs": 5},
+    "medium": {"accounts": 10_000, "cities": 10_000, "employees": 200_000,
+               "range_cars": 500, "fleet_cars": 5_000, "cli_runs": 20},
+    "large": {"accounts": 100_000, "cities": 50_000, "employees": 2_000_000,
+              "range_cars": 2_000, "fleet_cars": 20_000, "cli_runs": 50},
+}
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances",
+               "Ken", "Margaret", "Dennis"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth",
+              "Allen", "Thompson", "Hamilton", "Ritchie"]
+STREETS = ["Main Street", "Oak Avenue", "Baltimore Avenue", "Campus Drive",
+           "Knox Road"]
+CITIES = ["College_Park", "Hyattsville", "Greenbelt", "Richmond", "Durham"]
+STATES = ["MD", "VA", "NC", "DC", "PA"]
+
+
+def generate_accounts(count, rng):
+    """ Generate credit card accounts that can be paid off.
+
+    Args:
+        count (int): number of accounts.
+        rng (random.Random): source of randomness.
+
+    Returns:
+        list of tuple: (balance, apr, target amount, credit line, fees)
+            arguments for remaining_payments().
+    """
+    accounts = []
+    for _ in range(count):
+        balance = rng.uniform(100, 20_000)
+        # the minimum payment always covers interest below 24% APR
+        apr = rng.randint(0, 23)
+        target = None if rng.random() < 0.5 else balance * rng.uniform(.03, .2)
+        accounts.append((balance, apr, target,
+                         rng.choice([1_000, 5_000, 10_000, 25_000]),
+                         rng.randint(0, 10)))
+    return accounts
+
+
+def generate_connections(count, rng, degree=3):
+    """ Generate a random road network in the format used by gps.Map.
+
+    The cities form a ring, so the network is connected, plus degree - 1
+    random roads per city.
+
+    Args:
+        count (int): number of cities.
+        rng (random.Random): source of randomness.
+        degree (int, optional): roads leaving each city. Defaults to 3.
+
+    Returns:
+        dict: maps city names to lists of (neighbor, distance, interstate).
+    """
+    names = [f"City {i}" for i in range(count)]
+    connections = {name: [] for name in names}
+    for i, name in enumerate(names):
+        neighbors = [names[(i + 1) % count]]
+        neighbors += rng.sample(names, degree - 1)
+        for neighbor in neighbors:
+            if neighbor != name:
+                connections[name].append((neighbor, rng.randint(10, 400),
+                                          str(rng.randint(1, 99))))
+    return connections
+
+
+def write_employees(path, count, rng):
+    """ Write an employee file in the format read by people.main().
+
+    Args:
+        path (str): file to write.
+        count (int): number of lines.
+        rng (random.Random): source of randomness.
+
+    Side effects:
+        Creates or overwrites the file.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for _ in range(count):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            file.write(f"{first} {last} {rng.randint(1, 9999)} "
+                       f"{rng.choice(STREETS)} {rng.choice(CITIES)} "
+                       f"{rng.choice(STATES)} "
+                       f"{first.lower()}.{last.lower()}@example.com\n")
+
+
+def bench_remaining_payments(size, rng, workdir):
+    """ Pay off a portfolio of accounts. """
+    accounts = generate_accounts(SIZES[size]["accounts"], rng)
+
+    def run():
+        for account in accounts:
+            remaining_payments(*account)
+    return run
+
+
+def bench_bfs(size, rng, workdir, queries=5):
+    """ Route between random cities of a random road network. """
+    city_map = Map(generate_connections(SIZES[size]["cities"], rng))
+    names = list(city_map.cities)
+    pairs = [tuple(rng.sample(names, 2)) for _ in range(queries)]
+
+    def run():
+        for start, goal in pairs:
+            city_map.bfs(start, goal)
+    return run
+
+
+def bench_people(size, rng, workdir):
+    """ Parse an employee file. """
+    path = os.path.join(workdir, f"people-{size}.txt")
+    write_employees(path, SIZES[size]["employees"], rng)
+    return lambda: people.main(path)
+
+
+def bench_detect_collision(size, rng, workdir):
+    """ Check every car of a crowded driving range for collisions once. """
+    # imported here so the other benchmarks run without tkinter
+    from driving_range import DrivingRange
+
+    # stand-ins for CanvasCar and DrivingRange, which need a display
+    poses = random_poses(SIZES[size]["range_cars"], rng.randrange(2**32),
+                         width=4000, height=4000)
+    cars = [SimpleNamespace(car=SimpleNamespace(x=x, y=y)) for x, y, _ in poses]
+    driving_range = SimpleNamespace(cars=cars)
+
+    def run():
+        for car in cars:
+            DrivingRange.detect_collision(driving_range, car)
+    return run
+
+
+def bench_fleet(size, rng, workdir, ticks=10):
+    """ Step a headless fleet in a single process. """
+    count = SIZES[size]["fleet_cars"]
+    side = CAR_RADIUS * 6 * count ** 0.5
+    seed = rng.randrange(2**32)
+    poses = random_poses(count, seed, side, side)
+    return lambda: Fleet(poses, seed, side, side).step(ticks)
+
+
+def bench_cold_start(size, rng, workdir):
+    """ Start the command-line tool in a fresh interpreter repeatedly. """
+    command = [sys.executable,
+               os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "portfolio.py"),
+               "payoff", "1500", "18", "5000"]
+
+    def run():
+        for _ in range(SIZES[size]["cli_runs"]):
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+    return run
+
+
+BENCHMARKS = {
+    "credit_card.remaining_payments": bench_remaining_payments,
+    "gps.Map.bfs": bench_bfs,
+    "people.main": bench_people,
+    "driving_range.DrivingRange.detect_collision": bench_detect_collision,
+    "fleet.Fleet.step": bench_fleet,
+    "portfolio.cold_start": bench_cold_start,
+}
+# benchmarks whose work happens in child processes, out of tracemalloc's
+# sight; their peak memory is not measured
+SUBPROCESS_BENCHMARKS = {"portfolio.cold_start"}
+
+
+def measure(run, repeat, memory=True):
+    """ Time a benchmark and measure its peak memory.
+
+    Args:
+        run (callable): the benchmark.
+        repeat (int): number of timed runs.
+        memory (bool, optional): whether to make an extra run under
+            tracemalloc. Defaults to True.
+
+    Returns:
+        dict: fastest and median time of one run in seconds, the number of
+            runs per timed sample, and peak memory in bytes (None if memory
+            is False).
+    """
+    times = []
+    loops = 1
+    while len(times) < repeat:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if loops == 1 and not times and elapsed < MIN_SAMPLE_SECONDS:
+            # too quick to time alone; this run only calibrates the loop
+            loops = math.ceil(MIN_SAMPLE_SECONDS / max(elapsed, 1e-9))
+            continue
+        times.append(elapsed / loops)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(times), "median_seconds": statistics.median(times),
+            "loops": loops, "peak_bytes": peak}
+
+
+def run_benchmarks(sizes, names=None, repeat=3, memory=True):
+    """ Run benchmarks and collect their results.
+
+    Args:
+        sizes (list of str): keys of SIZES to run.
+        names (list of str, optional): keys of BENCHMARKS to run. Defaults to
+            all of them.
+        repeat (int, optional): timed runs per benchmark. Defaults to 3.
+        memory (bool, optional): whether to measure peak memory, except for
+            SUBPROCESS_BENCHMARKS. Defaults to True.
+
+    Returns:
+        dict: "meta" describes the machine; "results" maps
+            "name[size]" to the output of measure().
+
+    Side effects:
+        Prints each result as it is measured.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            for name in names or BENCHMARKS:
+                rng = random.Random(f"{SEED}:{name}:{size}")
+                run = BENCHMARKS[name](size, rng, workdir)
+                key = f"{name}[{size}]"
+                results[key] = measure(
+                    run, repeat, memory and name not in SUBPROCESS_BENCHMARKS)
+                peak = results[key]["peak_bytes"]
+                print(f"{key:<55} {results[key]['seconds']:12.4g} s"
+                      + (f" {peak / 2**20:10.1f} MiB" if peak is not None
+                         else ""))
+    return {
+        "meta": {"python": platform.python_version(),
+                 "implementation": platform.python_implementation(),
+                 "platform": platform.platform(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """ Find benchmarks that got slower or bigger than a baseline.
+
+    Args:
+        baseline (dict): results loaded from the baseline file.
+        current (dict): results loaded from the new file.
+        threshold (float, optional): relative increase that counts as a
+            regression. Defaults to 0.1 (10%).
+
+    Returns:
+        list of str: one description per regression.
+
+    Side effects:
+        Prints a comparison of every benchmark present in both files, after
+        a warning if the files come from different interpreters or
+        platforms.
+    """
+    for field in COMPARABLE_META:
+        old = baseline.get("meta", {}).get(field)
+        new = current.get("meta", {}).get(field)
+        if old != new:
+            print(f"warning: {field} differs ({old} -> {new}); timings may "
+                  f"not be comparable", file=sys.stderr)
+    regressions = []
+    old_results = baseline["results"]
+    new_results = current["results"]
+    for key in sorted(old_results.keys() & new_results.keys()):
+        for metric in ("seconds", "peak_bytes"):
+            old = old_results[key].get(metric)
+            new = new_results[key].get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{key} {metric}: {change:+.1%}")
+            print(f"{key:<55} {metric:<10} {old:12.4g} -> {new:12.4g} "
+                  f"{change:+7.1%}{flag}")
+    for key in sorted(old_results.keys() - new_results.keys()):
+        print(f"{key:<55} missing from the new results")
+    return regressions
+
+
+def load(path):
+    """ Load results saved by run_benchmarks(). """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def parse_args(args_list):
+    """ Parse command-line arguments.
+
+    Args:
+        args_list (list of str): the command-line arguments.
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks")
+    run.add_argument("--sizes", nargs="+", choices=SIZES,
+                     default=["small", "medium"], help="input sizes to run")
+    run.add_argument("--only", nargs="+", choices=BENCHMARKS,
+                     help="benchmarks to run (default: all)")
+    run.add_argument("--repeat", type=int, default=3,
+                     help="timed runs per benchmark")
+    run.add_argument("--no-memory", dest="memory", action="store_false",
+                     help="skip peak memory measurement")
+    run.add_argument("--output", default="bench_results.json",
+                     help="file to save results to")
+
+    comparison = commands.add_parser("compare",
+                                     help="compare results with a baseline")
+    comparison.add_argument("baseline", help="baseline results file")
+    comparison.add_argument("current", help="new results file")
+    comparison.add_argument("--threshold", type=float, default=0.1,
+                            help="relative increase that counts as a "
+                                 "regression")
+
+    args = parser.parse_args(args_list)
+    if args.command == "run" and args.repeat < 1:
+        parser.error("--repeat must be positive")
+    return args
+
+
+if __name__ == "__main__":
+    arguments = parse_args(sys.argv[1:])
+    if arguments.command == "run":
+        results = run_benchmarks(arguments.sizes, arguments.only,
+                                 arguments.repeat, arguments.memory)
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        found = compare(load(arguments.baseline), load(arguments.current),
+                        arguments.threshold)
+        if found:
+            print(f"{len(found)} regression(s) above "
+                  f"{arguments.threshold:.0%}")
+            sys.exit(1)
@@ -106,15 +106,17 @@ def main(balance,apr,targetamount = None ,credit_line=5000,fees=0):
     )
     return summary_message
 # interest_charged(), remaining_payments(), and main()
-def parse_args(args_list):
+def parse_args(args_list, prog=None):
     """Takes a list of strings from the command prompt and passes them through as
     arguments
     Args:
         args_list (list) : the list of strings from the command prompt
+        prog (str) : the program name shown in usage and error messages;
+            defaults to the name of the script
     Returns:
         args (ArgumentParser)
     """
-    parser = ArgumentParser()
+    parser = ArgumentParser(prog=prog)
     parser.add_argument('balance_amount', type = float, help = 'The total amount of balance left on the credit account')
     parser.add_argument('apr', type = int, help = 'The annual APR, should be an int between 1 and 100')
     parser.add_argument('credit_line', type = int, help = 'The maximum amount of balance allowed on the credit line.')
@@ -134,9 +136,18 @@ def parse_args(args_list):
         raise ValueError("fees must be positive")
     return args
 
-if __name__ == "__main__":
+def cli(args_list, prog=None):
+    """Runs the program as it is run from the command line.
+    Args:
+        args_list (list) : the list of strings from the command prompt
+        prog (str) : the program name shown in usage and error messages;
+            defaults to the name of the script
+    """
     try:
-        arguments = parse_args(sys.argv[1:])
+        arguments = parse_args(args_list, prog)
     except ValueError as e:
         sys.exit(str(e))
-    print(main(arguments.balance_amount, arguments.apr, credit_line = arguments.credit_line, targetamount = arguments.payment, fees = arguments.fees))
\ No newline at end of file
+    print(main(arguments.balance_amount, arguments.apr, credit_line = arguments.credit_line, targetamount = arguments.payment, fees = arguments.fees))
+
+if __name__ == "__main__":
+    cli(sys.argv[1:])
\ No newline at end of file
@@ -1,20 +1,24 @@
 """ A driving range for test-driving instances of the Car class. """
 
+from argparse import ArgumentParser
 from math import cos, dist, radians, sin
+import os
 import random
+import sys
 import tkinter as tk
 from tkinter import ttk
 
 from car import Car
+from fleet import (CANVAS_HEIGHT, CANVAS_WIDTH, CAR_RADIUS, DRIVE_DISTANCE,
+                   TICK_MS, make_fleet, random_poses)
+from instrument import metrics
+from trajectory import MAX_SEED, TrajectoryReader, TrajectoryWriter, seed_for
 
 
 # constants
-CAR_RADIUS = 15
 BORDER_WIDTH = 4
 ARROW_WIDTH = 3
-DRIVE_DISTANCE = 5
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
+MIN_REPLAY_MS = 10
 
 
 class CanvasCar:
@@ -24,6 +28,7 @@ class CanvasCar:
         car (Car): the car object.
         parent (DrivingRange): the widget containing the canvas.
         _self_driving (bool): whether or not the car should drive itself.
+        rng (random.Random): random number generator used for self-driving.
         car_obj (Canvas oval object): ID of the circle representing the car.
         orient_obj (Canvas line object): ID of the arrow representing the car's
             heading.
@@ -32,7 +37,7 @@ class CanvasCar:
                  arrowcolor="white", left_key="Left",
                  right_key="Right", drive_key="Up",
                  self_driving_key="Down",
-                 self_driving=False):
+                 self_driving=False, seed=None):
         """ Initialize a new graphical representation of a car.
 
         Args:
@@ -45,7 +50,8 @@ class CanvasCar:
             arrowcolor (str, optional): the color of the arrow. Defaults to
                 "white".
             left_key (str, optional): KeySym for counterclockwise turn.
-                Defaults to "Left".
+                Defaults to "Left". This and the other key arguments may be
+                None to leave the action unbound.
             right_key (str, optional): KeySym for clockwise turn. Defaults to
                 "Right".
             drive_key (str, optional): KeySym to drive. Defaults to "Up".
@@ -53,14 +59,17 @@ class CanvasCar:
                 Defaults to "Down".
             self_driving (bool, optional): If True, car will drive itself.
                 Defaults to False.
+            seed (int, optional): seed for the car's random number generator.
+                Defaults to None (seeded from the operating system).
         
         Side effects:
-            Creates and animates objects on the parent widget's canvas.
+            Creates objects on the parent widget's canvas.
             Binds events to the grandparent widget.
         """
         self.car = Car(x=x, y=y)
         self.parent = parent
         self._self_driving = self_driving
+        self.rng = random.Random(seed)
         canvas = self.parent.canvas
 
         self.car_obj = canvas.create_oval(-CAR_RADIUS, -CAR_RADIUS,
@@ -71,17 +80,14 @@ class CanvasCar:
                                              arrow=tk.FIRST, fill=arrowcolor,
                                              width=ARROW_WIDTH)
                 
-        self.parent.parent.bind(f"<KeyPress-{left_key}>",
-                                lambda event: self.turn(-15))
-        self.parent.parent.bind(f"<KeyPress-{right_key}>",
-                                lambda event: self.turn(15))
-        self.parent.parent.bind(f"<KeyPress-{drive_key}>",
-                                lambda event: self.drive())
-        self.parent.parent.bind(f"<KeyPress-{self_driving_key}>",
-                                lambda event: self.toggle_self_driving())
-        
-        if self._self_driving:
-            self.drive_self()
+        bindings = ((left_key, lambda event: self.turn(-15)),
+                    (right_key, lambda event: self.turn(15)),
+                    (drive_key, lambda event: self.drive()),
+                    (self_driving_key,
+                     lambda event: self.toggle_self_driving()))
+        for key, callback in bindings:
+            if key is not None:
+                self.parent.parent.bind(f"<KeyPress-{key}>", callback)
     
     @property
     def self_driving(self):
@@ -99,13 +105,12 @@ class CanvasCar:
             ValueError: new_value is not boolean.
         
         Side effects:
-            Animates car; see drive_self().
+            Starts or stops the car's self-driving steps; see
+            DrivingRange.tick().
         """
         if not isinstance(new_value, bool):
             raise ValueError("self_driving attribute must be boolean")
         self._self_driving = new_value
-        if new_value:
-            self.drive_self()
 
     def turn(self, degrees):
         """ Turn car.
@@ -121,6 +126,7 @@ class CanvasCar:
         self.car.turn(degrees)
         self.update_car()
     
+    @metrics.timed("canvas_car_drive_seconds")
     def drive(self):
         """ Drive car forward, if possible.
         
@@ -154,6 +160,7 @@ class CanvasCar:
         else:
             self.update_car()
     
+    @metrics.timed("canvas_car_update_seconds")
     def update_car(self):
         """ Draw the car in its new location and heading.
         
@@ -179,8 +186,8 @@ class CanvasCar:
     def drive_self(self):
         """ Turn a random amount and attempt to drive.
         
-        If the user has turned off self-driving since the last self-driving
-        step, do nothing. Otherwise, schedule the next self-driving step.
+        Called by the driving range once per tick. If self-driving is off, do
+        nothing.
         
         Side effects:
             Changes location and heading of car.
@@ -188,48 +195,227 @@ class CanvasCar:
         if not self._self_driving:
             return
         # favor slight turns most of the time, but allow turns as sharp as 45°.
-        turn = (random.random() * 2 - 1) ** 3 * 45
+        turn = (self.rng.random() * 2 - 1) ** 3 * 45
         self.turn(turn)
         self.drive()
-        # schedule next self-driving step
-        self.parent.after(200, self.drive_self)
 
 
 class DrivingRange(ttk.Frame):
     """ Main widget of the program. Contains a canvas on which cars are
     animated.
+
+    A single timer drives the range: every tick, each self-driving car takes
+    one step (or the followed fleet does), then the poses are recorded if a
+    recording is running.
     
     Attributes:
         cars (list of CanvasCar): list of all CanvasCar objects.
         parent (widget): tkinter widget that contains this DrivingRange widget.
         canvas (tkinter.Canvas): canvas on which cars are animated.
+        seed (int): session seed from which each car's seed is derived.
+        recorder (TrajectoryWriter): log the poses are recorded to, or None.
+        reader (TrajectoryReader): log being replayed, or None.
+        replay_tick (int): next frame of the log to draw.
+        world (tuple of float): width and height of the world shown.
+        fleet (Fleet): headless fleet being rendered, or None.
+        overlay (Canvas text object): ID of the text showing instrumentation,
+            or None.
     """
-    def __init__(self, parent, *args, **kwargs):
+    def __init__(self, parent, *args, seed=None, **kwargs):
         """ Initialize the DrivingRange widget.
         
         Args:
             parent (widget): the tkinter widget that contains this DrivingRange
                 widget.
             *args, **kwargs: arguments to pass to Canvas widget.
+            seed (int, optional): session seed. Defaults to None (a random
+                seed is chosen).
         
         Side effects:
             Creates and populates a widget.
         """
         self.cars = []
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.recorder = None
+        self.reader = None
+        self.replay_tick = 0
+        self.fleet = None
+        self.overlay = None
+        self._pair_checks_seen = 0
         tk.Frame.__init__(self, parent, *args, **kwargs)
         self.parent = parent
         self.canvas = tk.Canvas(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT,
                                 borderwidth=0, background="white")
         self.canvas.grid(column=0, row=0, sticky="nsew")
 
-        self.canvas.configure(scrollregion=(-CANVAS_WIDTH/2, -CANVAS_HEIGHT/2,
-                                            CANVAS_WIDTH/2, CANVAS_HEIGHT/2))
+        self.set_world(CANVAS_WIDTH, CANVAS_HEIGHT)
         self.canvas.xview_moveto(0.5)
         self.canvas.yview_moveto(0.5)
-        
+        # drag to pan around worlds larger than the canvas
+        self.canvas.bind("<ButtonPress-1>",
+                         lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind("<B1-Motion>",
+                         lambda event: self.canvas.scan_dragto(event.x, event.y,
+                                                               gain=1))
+        self.after(TICK_MS, self.tick)
+
+    def set_world(self, width, height):
+        """ Let the canvas be panned over a world centered on the origin.
+
+        Args:
+            width (float): width of the world.
+            height (float): height of the world.
+        """
+        self.world = (width, height)
+        self.canvas.configure(scrollregion=(-width/2, -height/2,
+                                            width/2, height/2))
+
     def add_car(self, *args, **kwargs):
-        """ Create a new CanvasCar. """
-        self.cars.append(CanvasCar(self, *args, **kwargs))        
+        """ Create a new CanvasCar.
+
+        Unless a seed is given, the car is seeded from the session seed and
+        its position in the list of cars, so sessions can be reproduced.
+        """
+        kwargs.setdefault("seed", seed_for(self.seed, len(self.cars)))
+        self.cars.append(CanvasCar(self, *args, **kwargs))
+
+    def tick(self):
+        """ Advance the driving range by one tick and schedule the next.
+
+        Side effects:
+            Moves every self-driving car or steps the followed fleet, then
+            appends the resulting poses to the trajectory log if recording.
+            Samples per-tick metrics while instrumentation is enabled.
+        """
+        if self.fleet is not None:
+            self.fleet.step()
+            self.draw_frame(self.fleet.poses())
+        for canvas_car in self.cars:
+            canvas_car.drive_self()
+        if self.recorder is not None:
+            self.recorder.write(self.poses())
+        if metrics.enabled:
+            self._sample_metrics()
+        self.after(TICK_MS, self.tick)
+
+    def poses(self):
+        """ Return the (x, y, heading) of every car. """
+        return [(c.car.x, c.car.y, c.car.heading) for c in self.cars]
+
+    def start_recording(self, path):
+        """ Record the pose of every car once per tick.
+
+        The current poses become the first frame; each tick then appends the
+        poses it produced.
+
+        Args:
+            path (str): trajectory log to create.
+
+        Raises:
+            FileExistsError: the log already exists.
+
+        Side effects:
+            Creates the log and writes its first frame.
+        """
+        self.recorder = TrajectoryWriter(path, len(self.cars), TICK_MS,
+                                         *self.world, self.seed)
+        self.recorder.write(self.poses())
+
+    def stop_recording(self):
+        """ Stop recording and close the trajectory log, if any. """
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def replay(self, path, start_tick=0, speed=1.0):
+        """ Animate the cars from a trajectory log instead of simulating them.
+
+        Cars are added until there is one for every car in the log, and the
+        canvas can be panned over the recorded world. At speeds too high to
+        draw every frame, frames are skipped.
+
+        Args:
+            path (str): trajectory log to replay.
+            start_tick (int, optional): first frame to draw; negative values
+                count from the end. Defaults to 0.
+            speed (float, optional): playback speed relative to the recorded
+                session. Defaults to 1.0.
+
+        Raises:
+            IndexError: start_tick is outside the log.
+
+        Side effects:
+            Adds cars and schedules replay steps until the log ends.
+        """
+        self.reader = TrajectoryReader(path)
+        self.set_world(self.reader.width, self.reader.height)
+        while len(self.cars) < self.reader.car_count:
+            self.add_car(left_key=None, right_key=None, drive_key=None,
+                         self_driving_key=None)
+        self._replay_interval = max(MIN_REPLAY_MS,
+                                    round(self.reader.tick_ms / speed))
+        self._replay_stride = max(1, round(speed * self._replay_interval
+                                           / self.reader.tick_ms))
+        self.seek(start_tick)
+        self.after(self._replay_interval, self._replay_step)
+
+    def seek(self, tick):
+        """ Jump to a frame of the log being replayed and draw it.
+
+        Args:
+            tick (int): frame to jump to; negative values count from the end.
+
+        Raises:
+            IndexError: tick is outside the log.
+        """
+        if tick < 0:
+            tick += len(self.reader)
+        if not 0 <= tick < len(self.reader):
+            raise IndexError(f"tick {tick} is outside the log")
+        self.draw_frame(self.reader.frame(tick))
+        self.replay_tick = tick + 1
+
+    def _replay_step(self):
+        """ Draw the next frame and schedule the following step. """
+        if self.reader is None or self.replay_tick >= len(self.reader):
+            return
+        self.draw_frame(self.reader.frame(self.replay_tick))
+        self.replay_tick += self._replay_stride
+        self.after(self._replay_interval, self._replay_step)
+
+    def follow(self, fleet):
+        """ Animate the cars of a headless fleet.
+
+        Cars are added until there is one for every car in the fleet, and the
+        canvas can be panned over the fleet's whole world.
+
+        Args:
+            fleet (Fleet): the fleet to step and draw every tick.
+
+        Side effects:
+            Adds cars; from now on every tick steps the fleet.
+        """
+        self.fleet = fleet
+        self.set_world(fleet.width, fleet.height)
+        while len(self.cars) < fleet.count:
+            self.add_car(left_key=None, right_key=None, drive_key=None,
+                         self_driving_key=None)
+        self.draw_frame(fleet.poses())
+
+    def draw_frame(self, poses):
+        """ Move the cars to the given poses.
+
+        Args:
+            poses (list of tuple): (x, y, heading) of every car, in order.
+
+        Side effects:
+            Redraws cars.
+        """
+        for canvas_car, (x, y, heading) in zip(self.cars, poses):
+            canvas_car.car.x = x
+            canvas_car.car.y = y
+            canvas_car.car.heading = heading
+            canvas_car.update_car()
     
     def detect_collision(self, car):
         """ Determine whether car overlaps with any other car.
@@ -246,23 +432,193 @@ class DrivingRange(ttk.Frame):
                 continue
             d = dist((car.car.x, car.car.y), (other_car.car.x, other_car.car.y))
             if d < CAR_RADIUS * 2:
+                if metrics.enabled:
+                    self._count_pair_checks(car, other_car)
                 return True
+        if metrics.enabled:
+            self._count_pair_checks(car)
         return False
 
+    def _count_pair_checks(self, car, stopped_at=None):
+        """ Count a call of detect_collision() and the pairs it checked.
+
+        The count is worked out afterwards so that the loop does no extra
+        work while instrumentation is disabled.
+
+        Args:
+            car (CanvasCar): the car that was checked.
+            stopped_at (CanvasCar, optional): the car it collided with, after
+                which no more pairs were checked. Defaults to None (every
+                other car was checked).
+        """
+        if stopped_at is None:
+            checks = len(self.cars) - 1
+        else:
+            stop = self.cars.index(stopped_at)
+            checks = stop if car in self.cars[:stop] else stop + 1
+        metrics.count("detect_collision_calls_total")
+        metrics.count("detect_collision_pair_checks_total", checks)
 
-def main():
-    """ Create the application. """
+    def show_metrics(self):
+        """ Show instrumentation in a corner of the canvas.
+
+        Side effects:
+            Enables the shared metrics registry and creates the overlay, which
+            every tick redraws.
+        """
+        metrics.enable()
+        self.overlay = self.canvas.create_text(0, 0, anchor="nw",
+                                               font=("TkFixedFont", 9))
+
+    def _sample_metrics(self):
+        """ Record per-tick metrics and redraw the overlay, if any. """
+        total = metrics.counters.get("detect_collision_pair_checks_total", 0)
+        metrics.observe("detect_collision_pair_checks_per_tick",
+                        total - self._pair_checks_seen)
+        self._pair_checks_seen = total
+        if self.overlay is not None:
+            self.canvas.itemconfigure(self.overlay, text=metrics.summary())
+            self.canvas.coords(self.overlay, self.canvas.canvasx(5),
+                               self.canvas.canvasy(5))
+            self.canvas.tag_raise(self.overlay)
+
+
+def main(record=None, replay=None, seed=None, speed=1.0, start_tick=0,
+         fleet_size=None, world=(CANVAS_WIDTH, CANVAS_HEIGHT), tiles=(1, 1),
+         overlay=False, metrics_path=None):
+    """ Create the application.
+
+    Args:
+        record (str, optional): trajectory log to record the session, or the
+            fleet, to.
+        replay (str, optional): trajectory log to replay instead of driving.
+        seed (int, optional): session seed. Defaults to None (random).
+        speed (float, optional): replay speed. Defaults to 1.0.
+        start_tick (int, optional): first frame to replay. Defaults to 0.
+        fleet_size (int, optional): if given, render a headless fleet of this
+            many cars instead of the two interactive cars.
+        world (tuple of float, optional): width and height of the fleet's
+            world. Defaults to the size of the canvas.
+        tiles (tuple of int, optional): tile columns and rows of the fleet;
+            more than one tile runs the fleet in worker processes. Defaults
+            to (1, 1).
+        overlay (bool, optional): if True, show instrumentation on the
+            canvas. Defaults to False.
+        metrics_path (str, optional): file to write instrumentation to when
+            the window closes; see Metrics.dump().
+    """
     root = tk.Tk()
-    dr = DrivingRange(root)
+    dr = DrivingRange(root, seed=seed)
     dr.grid(column=0, row=0, sticky="nsew")
-    dr.add_car(x=-CAR_RADIUS, self_driving=True)
-    dr.add_car(x=CAR_RADIUS, color="blue", bordercolor="dark blue",
-               arrowcolor="yellow", left_key="a", right_key="d",
-               drive_key="w", self_driving_key="s", self_driving=True)
-    root.resizable(False, False)
-    root.title("The driving range!")
-    root.mainloop()
+    fleet = None
+    try:
+        if replay is not None:
+            dr.replay(replay, start_tick=start_tick, speed=speed)
+        elif fleet_size is not None:
+            fleet = make_fleet(random_poses(fleet_size, dr.seed, *world),
+                               dr.seed, *world, tiles)
+            dr.follow(fleet)
+        else:
+            dr.add_car(x=-CAR_RADIUS, self_driving=True)
+            dr.add_car(x=CAR_RADIUS, color="blue", bordercolor="dark blue",
+                       arrowcolor="yellow", left_key="a", right_key="d",
+                       drive_key="w", self_driving_key="s",
+                       self_driving=True)
+        if record is not None:
+            dr.start_recording(record)
+        if metrics_path is not None:
+            metrics.enable()
+        if overlay:
+            dr.show_metrics()
+        root.resizable(False, False)
+        root.title("The driving range!")
+        root.mainloop()
+    finally:
+        dr.stop_recording()
+        if fleet is not None:
+            fleet.close()
+    if metrics_path is not None:
+        metrics.dump(metrics_path)
+
+
+def parse_args(args_list, prog=None):
+    """ Parse command-line arguments.
+
+    Args:
+        args_list (list of str): the command-line arguments.
+        prog (str, optional): program name shown in usage and error
+            messages. Defaults to the name of the script.
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = ArgumentParser(prog=prog)
+    parser.add_argument("--record", help="trajectory log to record to")
+    parser.add_argument("--replay", help="trajectory log to replay")
+    parser.add_argument("--seed", type=int, help="session seed")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed relative to real time")
+    parser.add_argument("--start-tick", type=int, default=0,
+                        help="first frame to replay")
+    parser.add_argument("--fleet", type=int, dest="fleet_size",
+                        help="render a headless fleet of this many cars")
+    parser.add_argument("--world", type=float, nargs=2,
+                        metavar=("WIDTH", "HEIGHT"),
+                        help="size of the fleet's world (default: the "
+                             "canvas)")
+    parser.add_argument("--tiles", type=int, nargs=2,
+                        metavar=("COLUMNS", "ROWS"),
+                        help="simulate the fleet in one process per tile "
+                             "(default: 1 1)")
+    parser.add_argument("--overlay", action="store_true",
+                        help="show instrumentation on the canvas")
+    parser.add_argument("--metrics", dest="metrics_path",
+                        help="file to write instrumentation to on exit "
+                             "(.json, or .prom for Prometheus text)")
+    args = parser.parse_args(args_list)
+    if args.record is not None and args.replay is not None:
+        parser.error("--record and --replay cannot be combined")
+    if args.record is not None and os.path.exists(args.record):
+        parser.error(f"{args.record} already exists")
+    if args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED}")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if args.replay is not None and args.fleet_size is not None:
+        parser.error("--replay and --fleet cannot be combined")
+    if args.fleet_size is None and (args.world or args.tiles):
+        parser.error("--world and --tiles require --fleet")
+    if args.fleet_size is not None and args.fleet_size < 0:
+        parser.error("--fleet must not be negative")
+    args.world = args.world or (CANVAS_WIDTH, CANVAS_HEIGHT)
+    args.tiles = args.tiles or (1, 1)
+    if min(args.tiles) < 1:
+        parser.error("--tiles must be positive")
+    return args
+
+
+def cli(args_list, prog=None):
+    """ Run the application as from the command line.
+
+    Args:
+        args_list (list of str): the command-line arguments.
+        prog (str, optional): program name shown in usage and error
+            messages. Defaults to the name of the script.
+
+    Raises:
+        SystemExit: the application could not start.
+    """
+    arguments = parse_args(args_list, prog)
+    try:
+        main(record=arguments.record, replay=arguments.replay,
+             seed=arguments.seed, speed=arguments.speed,
+             start_tick=arguments.start_tick,
+             fleet_size=arguments.fleet_size, world=tuple(arguments.world),
+             tiles=tuple(arguments.tiles), overlay=arguments.overlay,
+             metrics_path=arguments.metrics_path)
+    except (OSError, ValueError, IndexError) as e:
+        sys.exit(str(e))
 
 
 if __name__ == "__main__":
-    main()
+    cli(sys.argv[1:])
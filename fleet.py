@@ -0,0 +1,708 @@
+""" Headless simulation of large fleets of self-driving cars.
+
+Unlike the interactive driving range, where each car moves in turn, every
+car in a fleet moves at once: during a tick each car turns, proposes a new
+position and checks it against the positions the other cars had at the
+start of the tick. Proposals are then checked against each other in rounds;
+both cars of every conflicting pair go back to where they started, until a
+round finds no conflict. Turns come from a counter-based hash of the car's
+seed and the tick number instead of a stateful generator. Together these make
+a tick independent of the order in which cars are processed, so a fleet can
+be split into spatial tiles stepped by separate processes (see ShardedFleet)
+and still produce exactly the same poses as a single process (see Fleet).
+"""
+
+from argparse import ArgumentParser
+from array import array
+from math import cos, dist, radians, sin
+import os
+import random
+import sys
+import time
+
+from instrument import metrics
+from trajectory import MAX_SEED, TrajectoryWriter, seed_for
+
+
+# constants
+CAR_RADIUS = 15
+DRIVE_DISTANCE = 5
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 800
+TICK_MS = 200
+CELL_SIZE = CAR_RADIUS * 2
+# how far outside its tile a worker must see to catch every collision: a car
+# of the tile and a ghost can each move DRIVE_DISTANCE towards the other
+HALO = CAR_RADIUS * 2 + DRIVE_DISTANCE * 2
+# ticks between two scans of every car for those a worker must watch
+RESCAN_TICKS = 10
+MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _mix(z):
+    """ Scramble a 64-bit integer (the splitmix64 finalizer). """
+    z = (z + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def turn_amount(car_seed, tick):
+    """ Return how far a self-driving car turns during a tick.
+
+    Like CanvasCar.drive_self(), this favors slight turns but allows turns as
+    sharp as 45°.
+
+    Args:
+        car_seed (int): the car's seed.
+        tick (int): the tick number.
+
+    Returns:
+        float: degrees to turn; positive values are clockwise.
+    """
+    u = _mix(car_seed ^ _mix(tick)) / 2**64
+    return (u * 2 - 1) ** 3 * 45
+
+
+def random_poses(count, seed=0, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+    """ Place cars at random, non-overlapping spots with random headings.
+
+    Args:
+        count (int): number of cars.
+        seed (int, optional): seed for the placement. Defaults to 0.
+        width (float, optional): width of the world. Defaults to CANVAS_WIDTH.
+        height (float, optional): height of the world. Defaults to
+            CANVAS_HEIGHT.
+
+    Returns:
+        list of tuple: (x, y, heading) of every car.
+
+    Raises:
+        ValueError: the world is too small for count cars.
+    """
+    spacing = CAR_RADIUS * 3
+    columns = int((width - CAR_RADIUS * 2) // spacing)
+    rows = int((height - CAR_RADIUS * 2) // spacing)
+    if count > columns * rows:
+        raise ValueError(f"a {width}x{height} world holds at most "
+                         f"{columns * rows} cars")
+    rng = random.Random(seed)
+    spots = rng.sample(range(columns * rows), count)
+    return [(-width / 2 + CAR_RADIUS * 2 + (spot % columns) * spacing,
+             -height / 2 + CAR_RADIUS * 2 + (spot // columns) * spacing,
+             rng.uniform(0, 360))
+            for spot in spots]
+
+
+def build_grid(indices, xs, ys):
+    """ Bucket cars into square cells one collision distance wide.
+
+    Args:
+        indices (iterable of int): cars to bucket.
+        xs, ys (sequence of float): coordinates of all cars.
+
+    Returns:
+        dict: maps (column, row) of a cell to the list of cars in it.
+    """
+    grid = {}
+    for i in indices:
+        key = (int(xs[i] // CELL_SIZE), int(ys[i] // CELL_SIZE))
+        grid.setdefault(key, []).append(i)
+    return grid
+
+
+def advance(indices, grid, source, target, seed, tick, bounds):
+    """ Propose the moves of cars for one tick.
+
+    A car whose move would leave the world or come too close to where another
+    car started the tick stays put and turns around instead.
+
+    Args:
+        indices (iterable of int): cars to move.
+        grid (dict): cells of every car that could collide with the moving
+            cars; see build_grid().
+        source (tuple): x, y and heading sequences at the start of the tick.
+        target (tuple): x, y and heading sequences to write the result to.
+        seed (int): session seed.
+        tick (int): the tick number.
+        bounds (tuple): smallest x, smallest y, largest x and largest y a car
+            can be centered on.
+
+    Returns:
+        list of int: the cars that moved; see resolve_conflicts().
+
+    Side effects:
+        Writes the new pose of every car in indices to target.
+    """
+    xs, ys, headings = source
+    new_xs, new_ys, new_headings = target
+    left, top, right, bottom = bounds
+    moved = []
+    for i in indices:
+        heading = (headings[i] + turn_amount(seed_for(seed, i), tick)) % 360
+        x = xs[i] + DRIVE_DISTANCE * sin(radians(heading))
+        y = ys[i] - DRIVE_DISTANCE * cos(radians(heading))
+
+        blocked = not (left <= x <= right and top <= y <= bottom)
+        if not blocked:
+            column = int(x // CELL_SIZE)
+            row = int(y // CELL_SIZE)
+            for key in ((column + dc, row + dr)
+                        for dc in (-1, 0, 1) for dr in (-1, 0, 1)):
+                for j in grid.get(key, ()):
+                    if j != i and dist((x, y), (xs[j], ys[j])) < CELL_SIZE:
+                        blocked = True
+                        break
+                if blocked:
+                    break
+
+        if blocked:
+            x = xs[i]
+            y = ys[i]
+            heading = (heading + 180) % 360
+        else:
+            moved.append(i)
+        new_xs[i] = x
+        new_ys[i] = y
+        new_headings[i] = heading
+    return moved
+
+
+def find_conflicts(indices, grid, target):
+    """ Find moved cars that overlap another car's new position.
+
+    Args:
+        indices (iterable of int): moved cars to check.
+        grid (dict): cells of every car that could overlap them, bucketed by
+            their new positions; see build_grid().
+        target (tuple): x, y and heading sequences after the tick.
+
+    Returns:
+        list of int: the cars of indices that overlap another car.
+    """
+    xs, ys = target[0], target[1]
+    conflicts = []
+    for i in indices:
+        x = xs[i]
+        y = ys[i]
+        column = int(x // CELL_SIZE)
+        row = int(y // CELL_SIZE)
+        if any(j != i and dist((x, y), (xs[j], ys[j])) < CELL_SIZE
+               for dc in (-1, 0, 1) for dr in (-1, 0, 1)
+               for j in grid.get((column + dc, row + dr), ())):
+            conflicts.append(i)
+    return conflicts
+
+
+def revert(indices, source, target):
+    """ Put cars back where they started the tick, turned around.
+
+    Args:
+        indices (iterable of int): cars to put back.
+        source (tuple): x, y and heading sequences at the start of the tick.
+        target (tuple): x, y and heading sequences after the tick.
+
+    Side effects:
+        Rewrites the pose of every car in indices in target.
+    """
+    xs, ys = source[0], source[1]
+    new_xs, new_ys, new_headings = target
+    for i in indices:
+        new_xs[i] = xs[i]
+        new_ys[i] = ys[i]
+        new_headings[i] = (new_headings[i] + 180) % 360
+
+
+class Fleet:
+    """ A fleet of self-driving cars stepped in a single process.
+
+    Attributes:
+        count (int): number of cars.
+        seed (int): session seed.
+        width (float): width of the world, which is centered on the origin.
+        height (float): height of the world.
+        tick (int): number of ticks simulated so far.
+        buffers (list of tuple): two sets of x, y and heading sequences; the
+            poses at the current tick are in buffers[tick % 2].
+    """
+    def __init__(self, poses, seed=0, width=CANVAS_WIDTH,
+                 height=CANVAS_HEIGHT):
+        """ Initialize a fleet.
+
+        Args:
+            poses (list of tuple): initial (x, y, heading) of every car.
+            seed (int, optional): session seed. Defaults to 0.
+            width (float, optional): width of the world. Defaults to
+                CANVAS_WIDTH.
+            height (float, optional): height of the world. Defaults to
+                CANVAS_HEIGHT.
+        """
+        self.count = len(poses)
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.tick = 0
+        self.buffers = self._allocate()
+        xs, ys, headings = self.buffers[0]
+        for i, (x, y, heading) in enumerate(poses):
+            xs[i] = x
+            ys[i] = y
+            headings[i] = heading
+
+    @property
+    def bounds(self):
+        """ Smallest x, smallest y, largest x and largest y a car can be
+        centered on. """
+        return (-self.width / 2 + CAR_RADIUS, -self.height / 2 + CAR_RADIUS,
+                self.width / 2 - CAR_RADIUS, self.height / 2 - CAR_RADIUS)
+
+    def _allocate(self):
+        """ Create the two buffers of poses. """
+        return [tuple(array("d", bytes(8 * self.count)) for _ in range(3))
+                for _ in range(2)]
+
+    def poses(self):
+        """ Return the (x, y, heading) of every car at the current tick. """
+        return list(zip(*self.buffers[self.tick % 2]))
+
+    def step(self, ticks=1):
+        """ Simulate a number of ticks.
+
+        Args:
+            ticks (int, optional): number of ticks. Defaults to 1.
+
+        Side effects:
+            Moves the cars and advances tick.
+        """
+        everyone = range(self.count)
+        for _ in range(ticks):
+            with metrics.timer("fleet_tick_seconds"):
+                source = self.buffers[self.tick % 2]
+                target = self.buffers[(self.tick + 1) % 2]
+                grid = build_grid(everyone, source[0], source[1])
+                moved = advance(everyone, grid, source, target, self.seed,
+                                self.tick, self.bounds)
+                # every conflict is found before any car is put back, so
+                # both cars of a conflicting pair go back
+                while moved:
+                    grid = build_grid(everyone, target[0], target[1])
+                    conflicts = find_conflicts(moved, grid, target)
+                    if not conflicts:
+                        break
+                    revert(conflicts, source, target)
+                    reverted = set(conflicts)
+                    moved = [i for i in moved if i not in reverted]
+            self.tick += 1
+
+    def close(self):
+        """ Release resources held by the fleet. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _tile_of(x, y, bounds, tiles):
+    """ Return the index of the tile that owns a car at (x, y). """
+    left, top, right, bottom = bounds
+    columns, rows = tiles
+    column = min(columns - 1, max(0, int((x - left) * columns
+                                         // (right - left))))
+    row = min(rows - 1, max(0, int((y - top) * rows // (bottom - top))))
+    return row * columns + column
+
+
+def _region(bounds, tiles, tile, margin):
+    """ Return the smallest x, smallest y, largest x and largest y of a tile
+    grown by margin (shrunk if margin is negative). Sides on the edge of the
+    world extend to infinity, since the tile owns every car beyond them. """
+    left, top, right, bottom = bounds
+    columns, rows = tiles
+    column = tile % columns
+    row = tile // columns
+    tile_width = (right - left) / columns
+    tile_height = (bottom - top) / rows
+    tile_left = left + column * tile_width
+    tile_top = top + row * tile_height
+    return (-float("inf") if column == 0 else tile_left - margin,
+            -float("inf") if row == 0 else tile_top - margin,
+            (float("inf") if column == columns - 1
+             else tile_left + tile_width + margin),
+            (float("inf") if row == rows - 1
+             else tile_top + tile_height + margin))
+
+
+def _inside(indices, xs, ys, region):
+    """ Return the cars of indices whose position lies in a region. """
+    left, top, right, bottom = region
+    return [i for i in indices
+            if left <= xs[i] < right and top <= ys[i] < bottom]
+
+
+def _views(buffer, count):
+    """ Split shared memory into two buffers of x, y and heading views, and
+    a view of the number of conflicts each tile found in the last round. """
+    values = buffer.cast("d")
+    views = [values[k * count:(k + 1) * count] for k in range(6)]
+    return (values, [tuple(views[0:3]), tuple(views[3:6])],
+            values[6 * count:])
+
+
+def _release(values, buffers, conflict_counts):
+    """ Release memoryviews so their shared memory can be closed. """
+    for buffer in buffers:
+        for view in buffer:
+            view.release()
+    conflict_counts.release()
+    values.release()
+
+
+def _work(name, count, seed, bounds, tiles, tile, conn, barrier):
+    """ Step the cars of one tile whenever the coordinator asks.
+
+    Each message from the coordinator is a (start tick, number of ticks)
+    pair, or None to stop. At every tick the worker moves the cars whose
+    position lies in its tile, checking them against those cars plus ghosts:
+    cars of neighboring tiles that lie within HALO of its border.
+
+    Rather than scanning the whole fleet every tick, the worker keeps a list
+    of the cars close enough to reach its halo within RESCAN_TICKS ticks and
+    rescans the fleet only that often. Cars deep inside the tile are owned
+    without further checks; only cars near a border go through _tile_of(),
+    which hands them off to whichever tile they have moved into. A barrier
+    keeps all
+    workers on the same tick, and on the same round of conflict resolution:
+    each worker publishes how many conflicts it found, and the rounds stop
+    once no tile found any.
+
+    Args:
+        name (str): name of the shared memory holding the poses.
+        count (int): number of cars.
+        seed (int): session seed.
+        bounds (tuple): see Fleet.bounds.
+        tiles (tuple of int): number of tile columns and rows.
+        tile (int): index of the tile this worker owns.
+        conn (multiprocessing.connection.Connection): pipe to the
+            coordinator.
+        barrier (multiprocessing.Barrier): barrier shared by all workers.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(name=name)
+    values, buffers, conflict_counts = _views(shm.buf, count)
+    halo = _region(bounds, tiles, tile, HALO)
+    # a car moves at most DRIVE_DISTANCE per tick
+    reach = _region(bounds, tiles, tile,
+                    HALO + RESCAN_TICKS * DRIVE_DISTANCE)
+    # far enough from the borders that rounding cannot matter
+    inner = _region(bounds, tiles, tile, -CAR_RADIUS)
+    watched = []
+    scanned = None
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            start, ticks = message
+            for current in range(start, start + ticks):
+                source = buffers[current % 2]
+                xs, ys = source[0], source[1]
+                if scanned is None or current - scanned >= RESCAN_TICKS:
+                    watched = _inside(range(count), xs, ys, reach)
+                    scanned = current
+                nearby = _inside(watched, xs, ys, halo)
+                deep = _inside(nearby, xs, ys, inner)
+                interior = set(deep)
+                owned = deep + [i for i in nearby if i not in interior
+                                and _tile_of(xs[i], ys[i], bounds,
+                                             tiles) == tile]
+                target = buffers[(current + 1) % 2]
+                grid = build_grid(nearby, xs, ys)
+                moved = advance(owned, grid, source, target, seed, current,
+                                bounds)
+                barrier.wait()
+                while True:
+                    grid = build_grid(nearby, target[0], target[1])
+                    conflicts = find_conflicts(moved, grid, target)
+                    conflict_counts[tile] = len(conflicts)
+                    barrier.wait()
+                    if not any(conflict_counts):
+                        break
+                    revert(conflicts, source, target)
+                    reverted = set(conflicts)
+                    moved = [i for i in moved if i not in reverted]
+                    barrier.wait()
+            conn.send(ticks)
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        _release(values, buffers, conflict_counts)
+        shm.close()
+
+
+class ShardedFleet(Fleet):
+    """ A fleet split into spatial tiles, each stepped by its own process.
+
+    The poses live in shared memory. The coordinating process only sends
+    tick counts to the workers and reads merged snapshots from shared memory,
+    so it stays cheap enough to feed a renderer. See _work() for how tiles
+    exchange cars.
+
+    Attributes:
+        tiles (tuple of int): number of tile columns and rows.
+        processes (list of multiprocessing.Process): one worker per tile.
+    """
+    def __init__(self, poses, seed=0, width=CANVAS_WIDTH,
+                 height=CANVAS_HEIGHT, tiles=(2, 1)):
+        """ Initialize a fleet and start its workers.
+
+        Args:
+            poses (list of tuple): initial (x, y, heading) of every car.
+            seed (int, optional): session seed. Defaults to 0.
+            width (float, optional): width of the world. Defaults to
+                CANVAS_WIDTH.
+            height (float, optional): height of the world. Defaults to
+                CANVAS_HEIGHT.
+            tiles (tuple of int, optional): number of tile columns and rows.
+                Defaults to (2, 1).
+
+        Raises:
+            ValueError: tiles has a dimension smaller than 1.
+
+        Side effects:
+            Creates shared memory and starts one process per tile.
+        """
+        # imported here so single-process fleets start faster
+        import multiprocessing
+        from multiprocessing.shared_memory import SharedMemory
+
+        if min(tiles) < 1:
+            raise ValueError("there must be at least one tile column and row")
+        self.tiles = tuple(tiles)
+        self.processes = []
+        self._conns = []
+        self._values = None
+        self._shared_buffers = []
+        self._conflict_counts = None
+        tile_count = self.tiles[0] * self.tiles[1]
+        # two buffers of poses, then one conflict count per tile
+        self._shm = SharedMemory(create=True,
+                                 size=8 * (6 * len(poses) + tile_count))
+        try:
+            super().__init__(poses, seed, width, height)
+
+            barrier = multiprocessing.Barrier(tile_count)
+            for tile in range(tile_count):
+                conn, child_conn = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_work, daemon=True,
+                    args=(self._shm.name, self.count, self.seed, self.bounds,
+                          self.tiles, tile, child_conn, barrier))
+                process.start()
+                child_conn.close()
+                self.processes.append(process)
+                self._conns.append(conn)
+        except BaseException:
+            self.close()
+            raise
+
+    def _allocate(self):
+        """ Map the two buffers of poses onto shared memory. """
+        self._values, self._shared_buffers, self._conflict_counts = \
+            _views(self._shm.buf, self.count)
+        return self._shared_buffers
+
+    def step(self, ticks=1):
+        """ Simulate a number of ticks in the worker processes.
+
+        Args:
+            ticks (int, optional): number of ticks. Defaults to 1.
+
+        Raises:
+            RuntimeError: a worker exited unexpectedly.
+
+        Side effects:
+            Moves the cars and advances tick.
+        """
+        with metrics.timer("sharded_fleet_step_seconds"):
+            for conn in self._conns:
+                conn.send((self.tick, ticks))
+            try:
+                for conn in self._conns:
+                    conn.recv()
+            except EOFError:
+                raise RuntimeError("a simulation worker exited") from None
+        self.tick += ticks
+
+    def close(self):
+        """ Stop the workers and free the shared memory.
+
+        Side effects:
+            Joins the worker processes and unlinks the shared memory.
+        """
+        if self._shm is None:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join()
+        for conn in self._conns:
+            conn.close()
+        if self._values is not None:
+            _release(self._values, self._shared_buffers,
+                     self._conflict_counts)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+def make_fleet(poses, seed=0, width=CANVAS_WIDTH, height=CANVAS_HEIGHT,
+               tiles=(1, 1)):
+    """ Return a Fleet, or a ShardedFleet if there is more than one tile.
+
+    Args are as for ShardedFleet.
+    """
+    if tuple(tiles) == (1, 1):
+        return Fleet(poses, seed, width, height)
+    return ShardedFleet(poses, seed, width, height, tiles)
+
+
+def determinism_check(count=300, ticks=40, seed=0, width=1200, height=900,
+                      tiles=(2, 2)):
+    """ Check that a sharded fleet matches a single-process fleet exactly.
+
+    Returns:
+        bool: True if both fleets end up with identical poses.
+
+    Side effects:
+        Prints the outcome.
+    """
+    poses = random_poses(count, seed, width, height)
+    with Fleet(poses, seed, width, height) as single, \
+            ShardedFleet(poses, seed, width, height, tiles) as sharded:
+        single.step(ticks)
+        sharded.step(ticks)
+        same = single.poses() == sharded.poses()
+    print(f"{count} cars, {ticks} ticks, {tiles[0]}x{tiles[1]} tiles: "
+          f"{'identical' if same else 'DIFFERENT'}")
+    return same
+
+
+def main(cars, ticks, seed=0, width=CANVAS_WIDTH, height=CANVAS_HEIGHT,
+         tiles=(1, 1), record=None, metrics_path=None):
+    """ Simulate a fleet headlessly and report its throughput.
+
+    Args:
+        cars (int): number of cars.
+        ticks (int): number of ticks to simulate.
+        seed (int, optional): session seed. Defaults to 0.
+        width (float, optional): width of the world.
+        height (float, optional): height of the world.
+        tiles (tuple of int, optional): tile columns and rows. Defaults to
+            (1, 1), a single process.
+        record (str, optional): trajectory log to create and record every
+            tick to.
+        metrics_path (str, optional): file to write instrumentation to; see
+            Metrics.dump().
+
+    Returns:
+        float: car-ticks simulated per second.
+    """
+    if metrics_path is not None:
+        metrics.enable()
+    poses = random_poses(cars, seed, width, height)
+    writer = None
+    if record is not None:
+        writer = TrajectoryWriter(record, cars, TICK_MS, width, height,
+                                  seed)
+        writer.write(poses)
+    with make_fleet(poses, seed, width, height, tiles) as fleet:
+        start = time.perf_counter()
+        if writer is None:
+            fleet.step(ticks)
+        else:
+            for _ in range(ticks):
+                fleet.step()
+                writer.write(fleet.poses())
+        elapsed = time.perf_counter() - start
+    if writer is not None:
+        writer.close()
+    rate = cars * ticks / elapsed if elapsed else float("inf")
+    print(f"Simulated {cars} cars for {ticks} ticks in {elapsed:.2f} s "
+          f"({rate:,.0f} car-ticks per second)")
+    if metrics_path is not None:
+        metrics.dump(metrics_path)
+    return rate
+
+
+def parse_args(args_list, prog=None):
+    """ Parse command-line arguments.
+
+    Args:
+        args_list (list of str): the command-line arguments.
+        prog (str, optional): program name shown in usage and error
+            messages. Defaults to the name of the script.
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = ArgumentParser(prog=prog)
+    parser.add_argument("--cars", type=int, default=1000,
+                        help="number of cars")
+    parser.add_argument("--ticks", type=int, default=100,
+                        help="number of ticks to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="session seed")
+    parser.add_argument("--world", type=float, nargs=2,
+                        default=(4000, 4000), metavar=("WIDTH", "HEIGHT"),
+                        help="size of the world")
+    parser.add_argument("--tiles", type=int, nargs=2, default=(1, 1),
+                        metavar=("COLUMNS", "ROWS"),
+                        help="tiles, each simulated by its own process")
+    parser.add_argument("--record", help="trajectory log to record to")
+    parser.add_argument("--metrics", dest="metrics_path",
+                        help="file to write instrumentation to "
+                             "(.json, or .prom for Prometheus text)")
+    parser.add_argument("--check", action="store_true",
+                        help="compare sharded and single-process runs")
+    args = parser.parse_args(args_list)
+    if args.cars < 0 or args.ticks < 0:
+        parser.error("--cars and --ticks must not be negative")
+    if min(args.tiles) < 1:
+        parser.error("--tiles must be positive")
+    if not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED}")
+    if args.record is not None and os.path.exists(args.record):
+        parser.error(f"{args.record} already exists")
+    return args
+
+
+def cli(args_list, prog=None):
+    """ Run the simulation as from the command line.
+
+    Args:
+        args_list (list of str): the command-line arguments.
+        prog (str, optional): program name shown in usage and error
+            messages. Defaults to the name of the script.
+
+    Raises:
+        SystemExit: the determinism check ran, or the simulation failed.
+    """
+    arguments = parse_args(args_list, prog)
+    if arguments.check:
+        sys.exit(0 if determinism_check() else 1)
+    try:
+        main(arguments.cars, arguments.ticks, arguments.seed,
+             *arguments.world, tuple(arguments.tiles), arguments.record,
+             arguments.metrics_path)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    cli(sys.argv[1:])
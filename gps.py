@@ -1,7 +1,39 @@
 import sys
 import argparse
+
+from instrument import metrics
 #How to run: python your_program.py --starting_city Washington --destination_city Richmond
 
+# Interstate connections between cities: (neighbor, distance, interstate)
+CONNECTIONS = {
+    "Baltimore": [("Washington", 39, "95"), ("Philadelphia", 106, "95")],
+    "Washington": [("Baltimore", 39, "95"), ("Fredericksburg", 53, "95"), ("Bedford", 137, "70"), ("Philadelphia", 139, "95")],
+    "Fredericksburg": [("Washington", 53, "95"), ("Richmond", 60, "95")],
+    "Richmond": [("Charlottesville", 71, "64"), ("Williamsburg", 51, "64"), ("Durham", 151, "85"), ("Fredericksburg", 60, "95"), ("Raleigh", 171, "95")],
+    "Durham": [("Richmond", 151, "85"), ("Raleigh", 29, "40"), ("Greensboro", 54, "40")],
+    "Raleigh": [("Durham", 29, "40"), ("Wilmington", 129, "40"), ("Richmond", 171, "95")],
+    "Greensboro": [("Charlotte", 92, "85"), ("Durham", 54, "40"), ("Ashville", 173, "40")],
+    "Ashville": [("Greensboro", 173, "40"), ("Charlotte", 130, "40"), ("Knoxville", 116, "40"), ("Atlanta", 208, "85")],
+    "Charlotte": [("Atlanta", 245, "85"), ("Ashville", 130, "40"), ("Greensboro", 92, "85")],
+    "Jacksonville": [("Atlanta", 346, "75"), ("Tallahassee", 164, "10"), ("Daytona Beach", 86, "95")],
+    "Daytona Beach": [("Orlando", 56, "4"), ("Miami", 95, "268"), ("Jacksonville", 86, "95")],
+    "Orlando": [("Tampa", 94, "4"), ("Daytona Beach", 56, "4")],
+    "Tampa": [("Miami", 281, "75"), ("Orlando", 94, "4"), ("Atlanta", 456, "75"), ("Tallahassee", 243, "98")],
+    "Atlanta": [("Charlotte", 245, "85"), ("Ashville", 208, "85"), ("Chattanooga", 118, "75"), ("Macon", 83, "75"), ("Tampa", 456, "75"), ("Jacksonville", 346, "75"), ("Tallahassee", 273, "27")],
+    "Chattanooga": [("Atlanta", 118, "75"), ("Knoxville", 112, "75"), ("Nashville", 134, "24"), ("Birmingham", 148, "59")],
+    "Knoxville": [("Chattanooga", 112, "75"), ("Lexington", 172, "75"), ("Nashville", 180, "40"), ("Ashville", 116, "40")],
+    "Nashville": [("Knoxville", 180, "40"), ("Chattanooga", 134, "24"), ("Birmingam", 191, "65"), ("Memphis", 212, "40"), ("Louisville", 176, "65")],
+    "Louisville": [("Nashville", 176, "65"), ("Cincinnati", 100, "71"), ("Indianapolis", 114, "65"), ("St. Louis", 260, "64"), ("Lexington", 78, "64")],
+    "Cincinnati": [("Louisville", 100, "71"), ("Indianapolis", 112, "74"), ("Columbus", 99, "71")],
+    "Columbus": [("Cincinnati", 99, "71"), ("Indianapolis", 175, "70"), ("Cleveland", 143, "71")],
+    "Indianapolis": [("Columbus", 175, "70"), ("Cincinnati", 112, "74"), ("Louisville", 114, "65"), ("Chicago", 179, "65")],
+    "Chicago": [("Indianapolis", 179, "65"), ("Columbus", 143, "71"), ("St. Louis", 291, "55"), ("Detroit", 281, "94")],
+    "St. Louis": [("Indianapolis", 261, "65"), ("Louisville", 260, "64"), ("Chicago", 291, "55"), ("Kansas City", 239, "70")],
+    "Detroit": [("Chicago", 281, "94"), ("Cleveland", 170, "71"), ("Toledo", 52, "75")],
+    "Cleveland": [("Detroit", 170, "71"), ("Columbus", 143, "71")],
+}
+
+
 class City:
     def __init__(self, name):
         """Initialize a City with a given name.
@@ -58,6 +90,7 @@ class Map:
                 neighbor_city = self.cities[neighbor_name]
                 current_city.add_neighbor(neighbor_city, distance, interstate)
 
+    @metrics.timed("gps_bfs_seconds")
     def bfs(self, start_name: str, goal_name: str) -> list:
         """Find the shortest path between start and goal using BFS.
         
@@ -80,6 +113,8 @@ class Map:
 
         queue = [[start_city]]  # Start with the City object in a list
         explored = set()  # Set to track visited cities
+        tracking = metrics.enabled  # Only track the queue for instrumentation
+        peak_queue = 1  # Largest queue seen while tracking
 
         while queue:
             path = queue.pop(0)  # Get the first path from the queue
@@ -93,11 +128,28 @@ class Map:
                     neighbor = self.cities[neighbor_name]
                     new_path = path + [neighbor]
                     if neighbor == goal_city:
+                        if tracking:
+                            self._record_search(explored, max(peak_queue, len(queue)))
                         return new_path  # Return the path of City objects
                     queue.append(new_path)
+                if tracking and len(queue) > peak_queue:
+                    peak_queue = len(queue)
 
+        if tracking:
+            self._record_search(explored, peak_queue)
         return None  # If no path found
 
+    def _record_search(self, explored, peak_queue):
+        """Record how much work a search did.
+        
+        Parameters:
+            explored (set): The names of the cities the search expanded.
+            peak_queue (int): The largest number of paths queued at once.
+        """
+        metrics.count("gps_bfs_nodes_expanded_total", len(explored))
+        metrics.observe("gps_bfs_nodes_expanded", len(explored))
+        metrics.observe("gps_bfs_peak_queue_size", peak_queue)
+
     def __repr__(self):
         """Return the string representation of the cities in the map.
         
@@ -130,53 +182,43 @@ def main(start_city, end_city, connections):
         print(f"No route found from {start_city} to {end_city}.")
 
 
-def parse_args(args_list):
+def parse_args(args_list, prog=None):
     """Takes a list of strings from the command prompt and passes them through as arguments
     
     Args:
         args_list (list) : the list of strings from the command prompt
+        prog (str) : the program name shown in usage and error messages;
+            defaults to the name of the script
     Returns:
         args (ArgumentParser)
     """
 
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(prog=prog)
     
     parser.add_argument('--starting_city', type=str, help='The starting city in a route.')
     parser.add_argument('--destination_city', type=str, help='The destination city in a route.')
+    parser.add_argument('--metrics', type=str, default=None, help='File to write instrumentation to (.json, or .prom for Prometheus text).')
     
     args = parser.parse_args(args_list)
     
     return args
 
 
+def cli(args_list, prog=None):
+    """Runs the program as it is run from the command line.
+    
+    Args:
+        args_list (list) : the list of strings from the command prompt
+        prog (str) : the program name shown in usage and error messages;
+            defaults to the name of the script
+    """
+    args = parse_args(args_list, prog)
+    if args.metrics:
+        metrics.enable()
+    main(args.starting_city, args.destination_city, CONNECTIONS)
+    if args.metrics:
+        metrics.dump(args.metrics)
+
+
 if __name__ == "__main__":
-    connections = {  
-        "Baltimore": [("Washington", 39, "95"), ("Philadelphia", 106, "95")],
-        "Washington": [("Baltimore", 39, "95"), ("Fredericksburg", 53, "95"), ("Bedford", 137, "70"), ("Philadelphia", 139, "95")],
-        "Fredericksburg": [("Washington", 53, "95"), ("Richmond", 60, "95")],
-        "Richmond": [("Charlottesville", 71, "64"), ("Williamsburg", 51, "64"), ("Durham", 151, "85"), ("Fredericksburg", 60, "95"), ("Raleigh", 171, "95")],
-        "Durham": [("Richmond", 151, "85"), ("Raleigh", 29, "40"), ("Greensboro", 54, "40")],
-        "Raleigh": [("Durham", 29, "40"), ("Wilmington", 129, "40"), ("Richmond", 171, "95")],
-        "Greensboro": [("Charlotte", 92, "85"), ("Durham", 54, "40"), ("Ashville", 173, "40")],
-        "Ashville": [("Greensboro", 173, "40"), ("Charlotte", 130, "40"), ("Knoxville", 116, "40"), ("Atlanta", 208, "85")],
-        "Charlotte": [("Atlanta", 245, "85"), ("Ashville", 130, "40"), ("Greensboro", 92, "85")],
-        "Jacksonville": [("Atlanta", 346, "75"), ("Tallahassee", 164, "10"), ("Daytona Beach", 86, "95")],
-        "Daytona Beach": [("Orlando", 56, "4"), ("Miami", 95, "268"), ("Jacksonville", 86, "95")],
-        "Orlando": [("Tampa", 94, "4"), ("Daytona Beach", 56, "4")],
-        "Tampa": [("Miami", 281, "75"), ("Orlando", 94, "4"), ("Atlanta", 456, "75"), ("Tallahassee", 243, "98")],
-        "Atlanta": [("Charlotte", 245, "85"), ("Ashville", 208, "85"), ("Chattanooga", 118, "75"), ("Macon", 83, "75"), ("Tampa", 456, "75"), ("Jacksonville", 346, "75"), ("Tallahassee", 273, "27")],
-        "Chattanooga": [("Atlanta", 118, "75"), ("Knoxville", 112, "75"), ("Nashville", 134, "24"), ("Birmingham", 148, "59")],
-        "Knoxville": [("Chattanooga", 112, "75"), ("Lexington", 172, "75"), ("Nashville", 180, "40"), ("Ashville", 116, "40")],
-        "Nashville": [("Knoxville", 180, "40"), ("Chattanooga", 134, "24"), ("Birmingam", 191, "65"), ("Memphis", 212, "40"), ("Louisville", 176, "65")],
-        "Louisville": [("Nashville", 176, "65"), ("Cincinnati", 100, "71"), ("Indianapolis", 114, "65"), ("St. Louis", 260, "64"), ("Lexington", 78, "64")],
-        "Cincinnati": [("Louisville", 100, "71"), ("Indianapolis", 112, "74"), ("Columbus", 99, "71")],
-        "Columbus": [("Cincinnati", 99, "71"), ("Indianapolis", 175, "70"), ("Cleveland", 143, "71")],
-        "Indianapolis": [("Columbus", 175, "70"), ("Cincinnati", 112, "74"), ("Louisville", 114, "65"), ("Chicago", 179, "65")],
-        "Chicago": [("Indianapolis", 179, "65"), ("Columbus", 143, "71"), ("St. Louis", 291, "55"), ("Detroit", 281, "94")],
-        "St. Louis": [("Indianapolis", 261, "65"), ("Louisville", 260, "64"), ("Chicago", 291, "55"), ("Kansas City", 239, "70")],
-        "Detroit": [("Chicago", 281, "94"), ("Cleveland", 170, "71"), ("Toledo", 52, "75")],
-        "Cleveland": [("Detroit", 170, "71"), ("Columbus", 143, "71")],
-    }
-
-    args = parse_args(sys.argv[1:])
-    main(args.starting_city, args.destination_city, connections)
+    cli(sys.argv[1:])
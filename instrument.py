@@ -0,0 +1,216 @@
+""" Lightweight counters, timers and histograms for hot paths.
+
+Instrumentation is off by default. Hot paths guard their calls with
+``if metrics.enabled:`` so that, while disabled, they pay for a single
+attribute lookup. Timers are histograms of durations in seconds.
+"""
+
+from bisect import bisect_left
+from functools import wraps
+import json
+import time
+
+
+# upper bounds of histogram buckets; wide enough for both durations in
+# seconds and sizes such as queue lengths
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1, 10, 100, 1e3, 1e4, 1e5, 1e6)
+
+
+class Histogram:
+    """ Distribution of observed values.
+
+    Attributes:
+        counts (list of int): number of values in each bucket; the last
+            bucket holds values larger than every bound in BUCKETS.
+        count (int): number of values observed.
+        total (float): sum of values observed.
+        maximum (float): largest value observed.
+    """
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value):
+        """ Add a value to the distribution. """
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def mean(self):
+        """ Return the mean of the observed values, or 0 if there are none. """
+        return self.total / self.count if self.count else 0.0
+
+
+class _Timer:
+    """ Context manager that records its duration in a histogram. """
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    """ Context manager that does nothing; used while disabled. """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """ Registry of counters and histograms.
+
+    Attributes:
+        enabled (bool): whether values are being recorded.
+        counters (dict): maps names to counts.
+        histograms (dict): maps names to Histogram objects.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+
+    def enable(self):
+        """ Start recording values. """
+        self.enabled = True
+
+    def disable(self):
+        """ Stop recording values; what was recorded is kept. """
+        self.enabled = False
+
+    def reset(self):
+        """ Forget every recorded value. """
+        self.counters.clear()
+        self.histograms.clear()
+
+    def count(self, name, amount=1):
+        """ Add amount to a counter. """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def histogram(self, name):
+        """ Return the histogram with the given name, creating it if needed.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name, value):
+        """ Add a value to a histogram. """
+        if self.enabled:
+            self.histogram(name).observe(value)
+
+    def timer(self, name):
+        """ Return a context manager that records its duration.
+
+        Args:
+            name (str): name of the histogram of durations.
+
+        Returns:
+            context manager: records into the histogram, or does nothing
+                while disabled.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def timed(self, name):
+        """ Decorator that records the duration of every call.
+
+        Args:
+            name (str): name of the histogram of durations.
+        """
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.histogram(name).observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """ Return every recorded value as plain data.
+
+        Returns:
+            dict: "counters" maps names to counts; "histograms" maps names to
+                dicts of count, sum, mean, max and per-bucket counts.
+        """
+        return {
+            "counters": dict(self.counters),
+            "histograms": {
+                name: {"count": h.count, "sum": h.total, "mean": h.mean(),
+                       "max": h.maximum,
+                       "buckets": dict(zip([str(b) for b in BUCKETS]
+                                           + ["+Inf"], h.counts))}
+                for name, h in self.histograms.items()
+            },
+        }
+
+    def to_json(self):
+        """ Return every recorded value as a JSON document. """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """ Return every recorded value in the Prometheus text format. """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+        for name, h in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip([repr(float(b)) for b in BUCKETS]
+                                    + ["+Inf"], h.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines += [f"{name}_sum {h.total!r}", f"{name}_count {h.count}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """ Return a short human-readable summary, one metric per line. """
+        lines = [f"{name}: {value}"
+                 for name, value in sorted(self.counters.items())]
+        lines += [f"{name}: n={h.count} mean={h.mean():.3g} max={h.maximum:.3g}"
+                  for name, h in sorted(self.histograms.items())]
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """ Write every recorded value to a file.
+
+        Args:
+            path (str): file to write; Prometheus text if it ends in ".prom",
+                JSON otherwise.
+
+        Side effects:
+            Creates or overwrites the file.
+        """
+        if path.endswith(".prom"):
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+# the registry shared by every module
+metrics = Metrics()
@@ -9,7 +9,7 @@ Challenges Encountered: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 import argparse
 import re
 import sys
-#run using python script_name.py employees.txt
+#run using python people.py [employees.txt]; reads people.txt by default
 
 def parse_name(text):
     """Extracts the first and last name from the provided text.
@@ -108,29 +108,49 @@ def main(path):
             employee_list.append(employee)
     return employee_list
 
-def parse_args(args_list):
+def print_employees(employees):
+    """Prints the name, address, and email of each employee.
+    
+    Args:
+        employees (list): A list of Employee objects.
+    """
+    for employ in employees:
+        print(f"Name: {employ.first_name} {employ.last_name}")
+        print(f"Address: {employ.address.street}, {employ.address.city}, {employ.address.state}")
+        print(f"Email: {employ.email}")
+
+def parse_args(args_list, prog=None):
     """Parses command line arguments.
     
     Args:
         args_list (list): The list of command line arguments.
+        prog (str, optional): The program name shown in usage and error
+            messages. Defaults to the name of the script.
         
     Returns:
         argparse.Namespace: The parsed arguments as an object.
     """
-    parser = argparse.ArgumentParser()
-    parser.add_argument('required', type=float, help='This is an example of a required argument.')
-    parser.add_argument('--optional', '-o', type=int, default=12, help='This is an example of an optional argument')
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument('path', nargs='?', default='people.txt', help='The file containing employee data. Defaults to people.txt.')
     args = parser.parse_args(args_list)
     return args
 
+def cli(args_list, prog=None):
+    """Reads employee data and prints details, as run from the command line.
+    
+    Args:
+        args_list (list): The list of command line arguments.
+        prog (str, optional): The program name shown in usage and error
+            messages. Defaults to the name of the script.
+    """
+    arguments = parse_args(args_list, prog)
+    try:
+        employees = main(arguments.path)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+    print_employees(employees)
+
 if __name__ == "__main__":
     """Main script execution. Reads employee data and prints details.
     """
-    employees = main("people.txt")
-    for employ in employees:
-        print(f"Name: {employ.first_name} {employ.last_name}")
-        print(f"Address: {employ.address.street}, {employ.address.city}, {employ.address.state}")
-        print(f"Email: {employ.email}")
-
-    # Handle command line arguments for additional functionality
-    arguments = parse_args(sys.argv[1:])
\ No newline at end of file
+    cli(sys.argv[1:])
@@ -0,0 +1,134 @@
+""" Single entry point for every tool in the portfolio.
+
+Each subcommand hands the rest of the command line to the cli() function of
+the module it runs, and imports that module only when it is chosen, so starting
+one tool does not pay for loading the others (tkinter in particular is only
+loaded by "simulate --gui", which must come right after "simulate").
+
+Examples:
+    python portfolio.py payoff 1500 18 5000 --payment 200
+    python portfolio.py route --starting_city Washington --destination_city Richmond
+    python portfolio.py parse-people employees.txt
+    python portfolio.py simulate --cars 1000 --ticks 50
+    python portfolio.py simulate --gui --fleet 200
+
+Worker mode runs many invocations in one process. It reads one command per
+line from standard input, either as a JSON list of arguments or as a shell-
+style string, and answers each with a line of JSON holding its exit status
+and captured output:
+    echo '["payoff", "1500", "18", "5000"]' | python portfolio.py worker
+"""
+
+import sys
+
+
+def payoff(args_list):
+    """ Compute how long it takes to pay off a credit card. """
+    import credit_card
+    credit_card.cli(args_list, prog="portfolio.py payoff")
+
+
+def route(args_list):
+    """ Print directions between two cities. """
+    import gps
+    gps.cli(args_list, prog="portfolio.py route")
+
+
+def parse_people(args_list):
+    """ Print the employees found in a file. """
+    import people
+    people.cli(args_list, prog="portfolio.py parse-people")
+
+
+def simulate(args_list):
+    """ Simulate a fleet headlessly, or open the driving range if the first
+    argument is --gui. """
+    if args_list[:1] == ["--gui"]:
+        import driving_range
+        driving_range.cli(args_list[1:], prog="portfolio.py simulate --gui")
+    else:
+        import fleet
+        fleet.cli(args_list, prog="portfolio.py simulate")
+
+
+COMMANDS = {
+    "payoff": payoff,
+    "route": route,
+    "parse-people": parse_people,
+    "simulate": simulate,
+}
+USAGE = "usage: portfolio.py {" + ",".join(COMMANDS) + ",worker} ...\n"
+
+
+def run(args_list):
+    """ Run one invocation.
+
+    Args:
+        args_list (list of str): subcommand followed by its arguments.
+
+    Raises:
+        SystemExit: the subcommand or its arguments asked to exit.
+    """
+    if args_list[:1] in (["-h"], ["--help"]):
+        print(USAGE + __doc__)
+        return
+    if not args_list or args_list[0] not in COMMANDS:
+        sys.stderr.write(USAGE)
+        sys.exit(2)
+    COMMANDS[args_list[0]](args_list[1:])
+
+
+def serve(lines, out):
+    """ Run one invocation per line and report each result as JSON.
+
+    Args:
+        lines (iterable of str): commands, as JSON lists of arguments or as
+            shell-style strings. Blank lines are skipped.
+        out (file): where to write one JSON object per command, with keys
+            "status" (exit status), "stdout" and "stderr".
+
+    Side effects:
+        Runs the commands; modules they import stay loaded for the next one.
+    """
+    from contextlib import redirect_stderr, redirect_stdout
+    import io
+    import json
+    import shlex
+    import traceback
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = 0
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                args_list = (json.loads(line) if line.startswith("[")
+                             else shlex.split(line))
+                run([str(arg) for arg in args_list])
+            except SystemExit as e:
+                if isinstance(e.code, str):
+                    print(e.code, file=sys.stderr)
+                    status = 1
+                else:
+                    status = e.code or 0
+            except Exception:
+                traceback.print_exc()
+                status = 1
+        # keep one invocation's instrumentation out of the next
+        instrument = sys.modules.get("instrument")
+        if instrument is not None:
+            instrument.metrics.disable()
+            instrument.metrics.reset()
+        out.write(json.dumps({"status": status, "stdout": stdout.getvalue(),
+                              "stderr": stderr.getvalue()}) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["worker"]:
+        serve(sys.stdin, sys.stdout)
+    else:
+        run(sys.argv[1:])
@@ -0,0 +1,187 @@
+""" Compact binary trajectory logs for the driving range.
+
+A log is a fixed-size header followed by one fixed-size frame per tick. Each
+frame holds the pose (x, y, heading) of every car as little-endian 32-bit
+floats, so the offset of any tick can be computed directly and the frame read
+out of a memory map without scanning or re-simulating the session. One hour
+of 1,000 cars ticking every 200 ms takes about 216 MB.
+"""
+
+import mmap
+import os
+import struct
+
+
+# magic, number of cars, milliseconds per tick, session seed, width and
+# height of the world
+HEADER = struct.Struct("<8sIIQdd")
+MAGIC = b"DRTRAJ02"
+POSE_FIELDS = 3
+# seeds are stored as unsigned 64-bit integers
+MAX_SEED = 2**64 - 1
+
+
+def seed_for(seed, index):
+    """ Derive the seed of one car from the seed of a whole session.
+
+    Args:
+        seed (int): the session seed.
+        index (int): position of the car in the driving range.
+
+    Returns:
+        int: a 64-bit seed that is unique to the car within the session.
+    """
+    return (seed * 1_000_003 + index) & 0xFFFFFFFFFFFFFFFF
+
+
+def frame_struct(car_count):
+    """ Return the struct used to pack one frame for car_count cars. """
+    return struct.Struct(f"<{car_count * POSE_FIELDS}f")
+
+
+class TrajectoryWriter:
+    """ Append-only writer for a trajectory log.
+
+    Attributes:
+        path (str): path of the log file.
+        car_count (int): number of cars stored in every frame.
+        tick_ms (int): milliseconds between two frames.
+        width (float): width of the world, which is centered on the origin.
+        height (float): height of the world.
+        seed (int): seed of the recorded session.
+    """
+    def __init__(self, path, car_count, tick_ms, width, height, seed=0):
+        """ Create a new log.
+
+        Args:
+            path (str): path of the log file.
+            car_count (int): number of cars stored in every frame.
+            tick_ms (int): milliseconds between two frames.
+            width (float): width of the world.
+            height (float): height of the world.
+            seed (int, optional): seed of the recorded session. Defaults to 0.
+
+        Raises:
+            FileExistsError: the log already exists.
+            ValueError: seed is not between 0 and MAX_SEED.
+
+        Side effects:
+            Creates the file and writes its header.
+        """
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"seed must be between 0 and {MAX_SEED}")
+        self.path = path
+        self.car_count = car_count
+        self.tick_ms = tick_ms
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self._frame = frame_struct(car_count)
+
+        # "xb" refuses to overwrite an existing log
+        self.file = open(path, "xb")
+        self.file.write(HEADER.pack(MAGIC, car_count, tick_ms, seed, width,
+                                    height))
+
+    def write(self, poses):
+        """ Append one frame.
+
+        Args:
+            poses (list of tuple): (x, y, heading) of every car, in order.
+
+        Raises:
+            ValueError: poses does not contain exactly car_count entries.
+
+        Side effects:
+            Appends a frame to the log file.
+        """
+        if len(poses) != self.car_count:
+            raise ValueError(f"expected {self.car_count} poses, "
+                             f"got {len(poses)}")
+        values = []
+        for x, y, heading in poses:
+            values += (x, y, heading % 360)
+        self.file.write(self._frame.pack(*values))
+
+    def close(self):
+        """ Flush and close the log file. """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryReader:
+    """ Random-access reader for a trajectory log.
+
+    Attributes:
+        path (str): path of the log file.
+        car_count (int): number of cars stored in every frame.
+        tick_ms (int): milliseconds between two frames.
+        width (float): width of the recorded world.
+        height (float): height of the recorded world.
+        seed (int): seed of the recorded session.
+    """
+    def __init__(self, path):
+        """ Map a log into memory.
+
+        Args:
+            path (str): path of the log file.
+
+        Raises:
+            ValueError: the file is not a trajectory log.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        if os.fstat(self.file.fileno()).st_size < HEADER.size:
+            self.file.close()
+            raise ValueError(f"{path} is not a trajectory log")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.car_count, self.tick_ms, self.seed, self.width,
+         self.height) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a trajectory log")
+        self._frame = frame_struct(self.car_count)
+
+    def __len__(self):
+        """ Return the number of complete frames in the log. """
+        if not self._frame.size:
+            return 0
+        return (len(self.map) - HEADER.size) // self._frame.size
+
+    def frame(self, tick):
+        """ Return the poses recorded at a given tick.
+
+        Args:
+            tick (int): index of the frame; negative values count from the
+                end.
+
+        Returns:
+            list of tuple: (x, y, heading) of every car.
+
+        Raises:
+            IndexError: tick is outside the log.
+        """
+        count = len(self)
+        if tick < 0:
+            tick += count
+        if not 0 <= tick < count:
+            raise IndexError(f"tick {tick} is outside the log")
+        values = iter(self._frame.unpack_from(self.map, HEADER.size
+                                              + tick * self._frame.size))
+        return list(zip(values, values, values))
+
+    def close(self):
+        """ Unmap and close the log file. """
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()